@@ -0,0 +1,239 @@
+"""Batch export module for the PyEd text editor application.
+
+This module renders source files to highlighted HTML or ANSI text without
+opening a Tk window, using the same lexer and theme colors as the
+SyntaxHighlightedText widget. Files are spread over a process pool; the
+style table is built once and handed to every worker, and each file is
+streamed to disk token by token.
+
+Usage:
+    python main.py --export html --theme monokai --output out/ src/
+"""
+
+import argparse
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pygments import lex
+from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
+from highlight_style import create_lexer, style_table
+
+# File extensions picked up when a folder is exported
+SOURCE_EXTENSIONS = (".py", ".pyw")
+
+FORMATS = {"html": ".html", "ansi": ".ans"}
+
+# Per-worker state set up by init_worker()
+worker_lexer = None
+worker_openers = {}
+worker_format = None
+resolved_openers = {}
+
+def init_worker(table, fmt):
+    """Set up the lexer and the token markup in a worker process.
+
+    Args:
+        table (dict): The style table from style_table().
+        fmt (str): The output format, "html" or "ansi".
+    """
+    global worker_lexer, worker_format
+    worker_lexer = create_lexer()
+    worker_format = fmt
+    for token, (fg, bg, bold) in table.items():
+        worker_openers[token] = (
+            html_opener(fg, bg, bold) if fmt == "html" else ansi_opener(fg, bg, bold))
+
+
+def token_opener(token):
+    """Return the markup that starts a token, looking it up only once.
+
+    Args:
+        token (pygments.token._TokenType): The token type.
+    """
+    if token not in resolved_openers:
+        # Tokens the style doesn't list use their parent's style
+        parent = token
+        while str(parent) not in worker_openers and parent.parent is not None:
+            parent = parent.parent
+        resolved_openers[token] = worker_openers.get(str(parent), "")
+    return resolved_openers[token]
+
+
+def html_opener(fg, bg, bold):
+    """Return the opening span for a token style, or "" if it has none.
+
+    Args:
+        fg (str): The foreground color.
+        bg (str): The background color.
+        bold (bool): Whether the token is bold.
+    """
+    styles = []
+    if fg:
+        styles.append(f"color:{fg}")
+    if bg:
+        styles.append(f"background-color:{bg}")
+    if bold:
+        styles.append("font-weight:bold")
+    return f'<span style="{";".join(styles)}">' if styles else ""
+
+
+def ansi_opener(fg, bg, bold):
+    """Return the 24-bit escape sequence for a token style, or "".
+
+    Args:
+        fg (str): The foreground color.
+        bg (str): The background color.
+        bold (bool): Whether the token is bold.
+    """
+    codes = []
+    if bold:
+        codes.append("1")
+    for prefix, color in (("38", fg), ("48", bg)):
+        if color and len(color) == 7:
+            r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+            codes.append(f"{prefix};2;{r};{g};{b}")
+    return f"\x1b[{';'.join(codes)}m" if codes else ""
+
+
+def export_file(source, destination, background):
+    """Render one file to destination.
+
+    Args:
+        source (str): The path of the file to render.
+        destination (str): The path to write the output to.
+        background (str): The page background color of the theme.
+
+    Returns:
+        tuple: The number of bytes read and None, or 0 and an error
+            message if the file could not be exported.
+    """
+    try:
+        with open(source, "r", encoding="utf8", errors="replace") as file:
+            text = file.read()
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "w", encoding="utf8") as out:
+            if worker_format == "html":
+                title = html.escape(os.path.basename(source))
+                out.write(
+                    '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                    f"<title>{title}</title>\n</head>\n"
+                    f'<body style="background-color:{background}">\n'
+                    f'<pre style="background-color:{background}">')
+            for token, value in lex(text, worker_lexer):
+                opener = token_opener(token)
+                if worker_format == "html":
+                    value = html.escape(value, quote=False)
+                    out.write(f"{opener}{value}</span>" if opener else value)
+                else:
+                    out.write(f"{opener}{value}\x1b[0m" if opener else value)
+            if worker_format == "html":
+                out.write("</pre>\n</body>\n</html>\n")
+    except Exception as error:
+        # One bad file shouldn't stop the rest of the export
+        return 0, f"{source}: {error}"
+    return len(text.encode("utf8")), None
+
+
+def collect_sources(paths):
+    """Return the files to export, walking folders for source files.
+
+    Args:
+        paths (list): The files and folders given on the command line.
+    """
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, files in os.walk(path):
+                sources.extend(
+                    os.path.join(folder, name) for name in sorted(files)
+                    if name.endswith(SOURCE_EXTENSIONS))
+        elif os.path.isfile(path):
+            sources.append(path)
+    # Overlapping arguments would have two workers write the same output
+    return list(dict.fromkeys(os.path.abspath(source) for source in sources))
+
+
+def export_files(paths, output_dir, fmt="html", theme="default", jobs=None):
+    """Export files to output_dir and print the throughput.
+
+    The folder structure below the common parent of the sources is kept
+    in output_dir.
+
+    Args:
+        paths (list): The files and folders to export.
+        output_dir (str): The folder to write the output to.
+        fmt (str): The output format, "html" or "ansi".
+        theme (str): The name of the pygments style to use.
+        jobs (int): The number of worker processes, defaults to the CPU count.
+
+    Returns:
+        int: The number of files that could not be exported.
+    """
+    sources = collect_sources(paths)
+    if not sources:
+        print("No files to export.", file=sys.stderr)
+        return 0
+
+    style = get_style_by_name(theme)
+    table = style_table(style)
+    base = os.path.dirname(sources[0]) if len(sources) == 1 else os.path.commonpath(sources)
+    destinations = [
+        os.path.join(output_dir, os.path.relpath(source, base) + FORMATS[fmt])
+        for source in sources]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker, initargs=(table, fmt)) as executor:
+        results = executor.map(
+            export_file, sources, destinations, [style.background_color] * len(sources),
+            chunksize=max(1, len(sources) // ((jobs or os.cpu_count() or 1) * 8)))
+        total = 0
+        failed = 0
+        for size, error in results:
+            total += size
+            if error is not None:
+                failed += 1
+                print(f"Could not export {error}", file=sys.stderr)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    exported = len(sources) - failed
+    print(f"Exported {exported} files ({total / (1024 * 1024):.1f} MB) "
+          f"in {elapsed:.2f}s: {exported / elapsed:.1f} files/s, "
+          f"{total / (1024 * 1024) / elapsed:.2f} MB/s")
+    if failed:
+        print(f"{failed} files could not be exported.", file=sys.stderr)
+    return failed
+
+
+def main(argv):
+    """Run the batch export from command-line arguments.
+
+    Args:
+        argv (list): The command-line arguments, without the program name.
+
+    Returns:
+        int: The exit status, 1 if any file could not be exported.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py --export", description="Export highlighted source files.")
+    parser.add_argument("--export", choices=FORMATS, required=True,
+                        help="output format")
+    parser.add_argument("--theme", default="default",
+                        help="theme to use, as in View > Theme (default: default)")
+    parser.add_argument("--output", default="export",
+                        help="folder to write the output to (default: export)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("paths", nargs="+", help="files and folders to export")
+    args = parser.parse_args(argv)
+    try:
+        get_style_by_name(args.theme)
+    except ClassNotFound:
+        parser.error(f"unknown theme: {args.theme}")
+    failed = export_files(args.paths, args.output, args.export, args.theme, args.jobs)
+    return 1 if failed else 0
@@ -0,0 +1,207 @@
+"""Diagnostics module for the PyEd text editor application.
+
+This module checks the buffer for syntax errors, and for lint warnings
+when pyflakes is installed, without blocking the UI. Once edits have
+settled, a snapshot of the text is checked in a worker process. Every
+snapshot gets a generation number and results from older generations
+are thrown away. Results are cached by content hash, so checking text
+that was checked before is free.
+"""
+
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from pyflakes import api as pyflakes_api
+except ImportError:
+    pyflakes_api = None
+
+# Milliseconds without edits before the buffer is checked
+SETTLE_DELAY = 500
+
+# Milliseconds between two checks of whether a run has finished
+POLL_INTERVAL = 50
+
+# Number of results kept in the content hash cache
+CACHE_SIZE = 64
+
+class Reporter:
+    """Collects pyflakes messages as diagnostics."""
+
+    def __init__(self, source):
+        """__init__ method for Reporter class.
+
+        Args:
+            source (str): The checked text, used to convert columns.
+        """
+        self.lines = source.split("\n")
+        self.diagnostics = []
+
+
+    def unexpectedError(self, filename, message):
+        """Record an error pyflakes hit while reading the source."""
+        self.diagnostics.append((1, 0, "error", str(message)))
+
+
+    def syntaxError(self, filename, message, lineno, offset, text):
+        """Record a syntax error found by pyflakes."""
+        self.diagnostics.append((lineno or 1, max((offset or 1) - 1, 0), "error", message))
+
+
+    def flake(self, message):
+        """Record a pyflakes warning."""
+        # pyflakes columns are UTF-8 byte offsets, the text widget counts characters
+        col = message.col
+        if 0 < message.lineno <= len(self.lines):
+            line = self.lines[message.lineno - 1].encode("utf8", "surrogatepass")
+            col = len(line[:col].decode("utf8", "ignore"))
+        self.diagnostics.append((
+            message.lineno, col, "warning",
+            message.message % message.message_args))
+
+
+def check_source(source, filename):
+    """Check source for problems in a worker process.
+
+    Args:
+        source (str): The text to check.
+        filename (str): The name used in messages.
+
+    Returns:
+        list: (line, column, severity, message) tuples.
+    """
+    try:
+        compile(source, filename, "exec", dont_inherit=True)
+    except SyntaxError as error:
+        return [(error.lineno or 1, max((error.offset or 1) - 1, 0), "error", error.msg)]
+    except ValueError as error:
+        # Source containing null bytes
+        return [(1, 0, "error", str(error))]
+
+    if pyflakes_api is None:
+        return []
+    reporter = Reporter(source)
+    pyflakes_api.check(source, filename, reporter)
+    return reporter.diagnostics
+
+
+class DiagnosticsService:
+    def __init__(self, text_area, result_callback, delay=SETTLE_DELAY):
+        """__init__ method for DiagnosticsService class.
+
+        Args:
+            text_area (SyntaxHighlightedText): The text area to check.
+            result_callback (callable): Called with the list of
+                diagnostics when a check of the current text finishes.
+            delay (int): Milliseconds without edits before checking.
+        """
+        self.text_area = text_area
+        self.result_callback = result_callback
+        self.delay = delay
+        self.filename = "<buffer>"
+
+        self.generation = 0
+        self.timer = None
+        self.future = None
+        self.cache = OrderedDict()
+        self.executor = None
+        self.start_executor()
+
+
+    def start_executor(self):
+        """Start a new worker process, shutting down the old one if any."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        # spawn keeps the worker clear of Tk and any running threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+    def schedule(self, filename=None):
+        """Check the text once edits have settled.
+
+        Every call starts a new generation, so results of earlier
+        snapshots are ignored.
+
+        Args:
+            filename (str): The name of the file being edited, if known.
+        """
+        if filename:
+            self.filename = filename
+        self.generation += 1
+        if self.timer is not None:
+            self.text_area.after_cancel(self.timer)
+        self.timer = self.text_area.after(self.delay, self.run)
+
+
+    def run(self):
+        """Take a snapshot of the text and check it in the worker."""
+        self.timer = None
+        # Chunked long lines don't match the lines of the file, so the
+        # positions would be wrong
+        if self.text_area.tag_ranges("soft_break"):
+            self.result_callback([])
+            return
+
+        source = self.text_area.get_content()
+        key = hashlib.sha256(source.encode("utf8", "surrogatepass")).hexdigest()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.result_callback(self.cache[key])
+            return
+
+        # A stale run that hasn't started yet is dropped
+        if self.future is not None:
+            self.future.cancel()
+        try:
+            self.future = self.executor.submit(check_source, source, self.filename)
+        except (BrokenProcessPool, RuntimeError):
+            # The worker died, e.g. killed for memory; retry in a new one
+            try:
+                self.start_executor()
+                self.future = self.executor.submit(check_source, source, self.filename)
+            except (BrokenProcessPool, RuntimeError, OSError):
+                self.future = None
+                self.result_callback([])
+                return
+        self.text_area.after(
+            POLL_INTERVAL, self.poll, self.future, self.generation, key)
+
+
+    def poll(self, future, generation, key):
+        """Apply the result of a run once it has finished.
+
+        Args:
+            future (concurrent.futures.Future): The running check.
+            generation (int): The generation the run was started for.
+            key (str): The content hash of the checked snapshot.
+        """
+        if not future.done():
+            self.text_area.after(POLL_INTERVAL, self.poll, future, generation, key)
+            return
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            if isinstance(future.exception(), BrokenProcessPool):
+                self.start_executor()
+            # Don't leave the old text's diagnostics showing
+            if generation == self.generation:
+                self.result_callback([])
+            return
+
+        diagnostics = future.result()
+        self.cache[key] = diagnostics
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+        # The text changed since the snapshot was taken
+        if generation == self.generation:
+            self.result_callback(diagnostics)
+
+
+    def close(self):
+        """Stop the worker process."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -11,8 +11,10 @@ from tkinter import filedialog, messagebox
 from tkinter import font
 from text_editor import TextEditor
 from find_replace_dialog import FindReplaceDialog
-from syntax_highlighted_text import SyntaxHighlightedText
+from syntax_highlighted_text import SyntaxHighlightedText, LONG_LINE_THRESHOLD
 from file_explorer import FileExplorer
+from file_watcher import FileWatcher
+from diagnostics import DiagnosticsService
 
 class EditorGUI:
     def __init__(self, root) -> None:
@@ -27,11 +29,15 @@ class EditorGUI:
         # Variables
         self.show_line_numbers = tk.IntVar(value=1)
         self.show_file_explorer = tk.IntVar(value=1)
+        self.chunk_long_lines = tk.IntVar(value=1)
         self.file_status_var = tk.StringVar()
         self.position_status_var = tk.StringVar()
+        self.undo_status_var = tk.StringVar()
+        self.diagnostics_status_var = tk.StringVar()
         self.current_theme = tk.StringVar(value="default")
         self.bg_color = "yellow"
         self.ignore_modified = False
+        self.long_line_threshold = LONG_LINE_THRESHOLD
 
         # Track modified status
         self.is_modified = False
@@ -43,9 +49,16 @@ class EditorGUI:
         # Initialize GUI
         self.draw_gui()
 
+        # Reload the open file when it is changed by another program
+        self.file_watcher = FileWatcher(self.root, self.reload_file)
+
+        # Check the text for syntax errors off the UI thread
+        self.diagnostics = DiagnosticsService(self.text_area, self.show_diagnostics)
+
         # Update status bar
         self.update_file_status()
         self.update_line_col()
+        self.update_undo_status()
 
 
     def draw_gui(self) -> None:
@@ -87,6 +100,8 @@ class EditorGUI:
         self.text_area.bind("<Key>", self.text_modified_callback)
         self.text_area.bind("<KeyRelease>", self.update_line_col)
         self.text_area.bind("<ButtonRelease>", self.update_line_col)
+        self.text_area.undo_history.on_change = self.update_undo_status
+        self.text_area.paste_callback = self.paste_callback
         self.text_area.pack(side="left", expand=True, fill="both")
 
         # Set tabs to 4 spaces
@@ -135,6 +150,16 @@ class EditorGUI:
             self.status_frame, textvariable=self.position_status_var, anchor="e")
         self.position_status_label.pack(side="right", padx=(0, 10))
 
+        # Status Bar Right: Undo history info
+        self.undo_status_label = tk.Label(
+            self.status_frame, textvariable=self.undo_status_var, anchor="e")
+        self.undo_status_label.pack(side="right", padx=(0, 10))
+
+        # Status Bar Right: Diagnostics info
+        self.diagnostics_status_label = tk.Label(
+            self.status_frame, textvariable=self.diagnostics_status_var, anchor="e")
+        self.diagnostics_status_label.pack(side="right", padx=(0, 10))
+
 
     def draw_menu(self) -> None:
         """Draws the menu bar for the text editor."""
@@ -238,6 +263,13 @@ class EditorGUI:
             offvalue=0,
             variable=self.show_file_explorer,
             command=self.toggle_file_explorer)
+
+        view_menu.add_checkbutton(
+            label="Chunk Long Lines",
+            onvalue=1,
+            offvalue=0,
+            variable=self.chunk_long_lines,
+            command=self.toggle_chunk_long_lines)
         
         # Toggles key binding
         # TODO: These don't work FIX ME <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
@@ -299,7 +331,11 @@ class EditorGUI:
     def new_file(self) -> None:
         """Creates a new file in the text editor."""
         self.text_editor.text_buffer = ""
+        self.text_area.set_long_line_mode(False)
         self.text_area.delete("1.0", "end")
+        self.text_area.edit_reset()
+        self.file_watcher.watch(None)
+        self.diagnostics.schedule()
         self.is_modified = False
         self.update_file_status()
         self.create_new_tab()
@@ -313,8 +349,18 @@ class EditorGUI:
         if file_path:
             self.ignore_modified = True
             self.text_editor.open_file(file_path)
+
+            # Minified/generated files get the lightweight long-line mode
+            long_lines = (self.text_editor.longest_line_length()
+                          > self.long_line_threshold)
+            self.text_area.set_long_line_mode(long_lines)
             self.text_area.delete("1.0", "end")
-            self.text_area.insert("1.0", self.text_editor.text_buffer)
+            if long_lines and self.chunk_long_lines.get():
+                self.text_area.insert_chunked("1.0", self.text_editor.text_buffer)
+            else:
+                self.text_area.insert("1.0", self.text_editor.text_buffer)
+            self.text_area.edit_reset()
+            self.file_watcher.watch(file_path)
             self.is_modified = False
             self.ignore_modified = False
 
@@ -323,10 +369,101 @@ class EditorGUI:
 
             self.update_file_status()
             self.update_line_numbers()
-            self.text_area.highlight()
+            self.text_area.highlight(initial=True)
+            self.diagnostics.schedule(file_path)
             self.text_area.focus_set()
 
 
+    def reload_file(self, path) -> None:
+        """Reloads the open file after it was changed on disk.
+
+        Only the changed lines are replaced in the text area, so the
+        cursor, scroll position, highlighting of unchanged lines and the
+        undo history are kept. The reload itself can be undone.
+
+        Args:
+            path (str): The path of the changed file.
+        """
+        try:
+            self.text_editor.open_file(path)
+        except (OSError, UnicodeDecodeError) as error:
+            messagebox.showerror(
+                "File changed",
+                f"{os.path.basename(path)} was changed on disk but could "
+                f"not be reloaded:\n{error}")
+            return
+
+        if self.is_modified:
+            reload = messagebox.askyesno(
+                "File changed",
+                f"{os.path.basename(path)} was changed on disk. "
+                "Reload it and discard your changes?")
+            if not reload:
+                return
+            self.is_modified = False
+
+        # Chunked or new long lines need the full open, which sets up
+        # long-line mode
+        if (self.text_area.tag_ranges("soft_break")
+                or self.text_editor.longest_line_length() > self.long_line_threshold):
+            self.open_file(path)
+            return
+
+        self.ignore_modified = True
+        applied = self.text_area.apply_diff(self.text_editor.text_buffer)
+        self.ignore_modified = False
+
+        # Too many changed lines to diff quickly, reload everything
+        if not applied:
+            self.open_file(path)
+            return
+
+        self.update_file_status()
+        self.update_line_numbers()
+        self.update_line_col()
+        self.diagnostics.schedule()
+
+
+    def toggle_chunk_long_lines(self) -> None:
+        """Shows the open long-line file with or without chunking.
+
+        The chunked view is read-only, so this is how it is made editable.
+        The undo history is reset.
+        """
+        if not self.text_area.long_line_mode:
+            return
+
+        content = self.text_area.get_content()
+        self.ignore_modified = True
+        # Also makes a chunked view editable again
+        self.text_area.set_long_line_mode(True)
+        self.text_area.delete("1.0", "end")
+        if self.chunk_long_lines.get():
+            self.text_area.insert_chunked("1.0", content)
+        else:
+            self.text_area.insert("1.0", content)
+        self.text_area.edit_reset()
+        self.ignore_modified = False
+
+        self.update_file_status()
+        self.update_line_numbers()
+        self.text_area.highlight(initial=True)
+        self.diagnostics.schedule()
+
+
+    def open_paths(self, paths) -> None:
+        """Opens files and folders passed on the command line.
+
+        Args:
+            paths (list): The paths of the files and folders to open.
+        """
+        for path in paths:
+            if os.path.isdir(path):
+                self.open_folder(path)
+            elif os.path.isfile(path):
+                self.open_file(path)
+
+
     def open_folder(self, path=None) -> None:
         """Opens a folder in the file explorer."""
         if path and os.path.isfile(path):
@@ -352,14 +489,16 @@ class EditorGUI:
     def on_closing(self) -> None:
         """Called when the window is closing."""
         self.on_open_file()
+        self.diagnostics.close()
         self.root.destroy()
 
 
     def save_file(self) -> None:
         """Saves the current file in the text editor."""
         if self.text_editor.current_file:
-            self.text_editor.text_buffer = self.text_area.get("1.0", "end")
+            self.text_editor.text_buffer = self.text_area.get_content()
             self.text_editor.save_file_as(self.text_editor.current_file)
+            self.file_watcher.watch(self.text_editor.current_file)
             self.is_modified = False
             self.update_file_status()
         else:
@@ -371,8 +510,9 @@ class EditorGUI:
         file_path = filedialog.asksaveasfilename(
             defaultextension=".py", filetypes=[("All Files", "*.*")])
         if file_path:
-            self.text_editor.text_buffer = self.text_area.get("1.0", "end")
+            self.text_editor.text_buffer = self.text_area.get_content()
             self.text_editor.save_file_as(file_path)
+            self.file_watcher.watch(file_path)
             self.is_modified = False
             self.update_file_status()
 
@@ -383,12 +523,27 @@ class EditorGUI:
         Args:
             event (tk.Event): The event that triggered the callback.
         """
-        if not self.ignore_modified:
+        # Paste updates everything once it has finished
+        if not self.ignore_modified and not self.text_area.pasting:
             self.is_modified = True
             self.update_line_col()
             self.update_file_status()
             self.update_line_numbers()
             self.text_area.highlight()
+            self.diagnostics.schedule()
+
+
+    def paste_callback(self) -> None:
+        """Called when a paste into the text area has completed.
+
+        The text area re-highlights the pasted region itself, so only
+        the status bar and line numbers are updated here.
+        """
+        self.is_modified = True
+        self.update_line_col()
+        self.update_file_status()
+        self.update_line_numbers()
+        self.diagnostics.schedule()
 
 
     def change_theme(self) -> None:
@@ -472,6 +627,23 @@ class EditorGUI:
         self.position_status_var.set(f"Ln {line}, Col {col}")
 
 
+    def show_diagnostics(self, diagnostics):
+        """Shows diagnostics in the text area and counts them in the status bar.
+
+        Args:
+            diagnostics (list): (line, column, severity, message) tuples.
+        """
+        self.text_area.show_diagnostics(diagnostics)
+        errors = sum(1 for d in diagnostics if d[2] == "error")
+        warnings = len(diagnostics) - errors
+        self.diagnostics_status_var.set(f"Errors: {errors}, Warnings: {warnings}")
+
+
+    def update_undo_status(self):
+        """Updates the undo history size in the status bar."""
+        self.undo_status_var.set(self.text_area.undo_history.describe())
+
+
     def update_file_status(self, event=None):
         """Updates the file status in the status bar.
         
@@ -482,6 +654,10 @@ class EditorGUI:
         file_name = os.path.abspath(
             self.text_editor.current_file) if self.text_editor.current_file else "New File"
         file_status = f"{file_name}{' (modified)' if self.is_modified else ''}"
+        if self.text_area.read_only:
+            file_status += " [long-line mode, chunked, read-only]"
+        elif self.text_area.long_line_mode:
+            file_status += " [long-line mode]"
         self.file_status_var.set(file_status)
         
 
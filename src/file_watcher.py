@@ -0,0 +1,67 @@
+"""FileWatcher module for the PyEd text editor application.
+
+This module provides the FileWatcher class, which polls the file open in
+the editor and reports when it has been changed on disk by another
+program. Polling only calls os.stat and compares the modification time,
+size and inode, so it is cheap enough to run every second.
+"""
+
+import os
+
+# Milliseconds between two checks of the watched file
+POLL_INTERVAL = 1000
+
+class FileWatcher:
+    def __init__(self, root, change_callback, interval=POLL_INTERVAL):
+        """__init__ method for FileWatcher class.
+
+        Args:
+            root (tk.Tk): The root window, used to schedule the polling.
+            change_callback (callable): Called with the path of the watched
+                file when it changes on disk.
+            interval (int): Milliseconds between two checks.
+        """
+        self.root = root
+        self.change_callback = change_callback
+        self.interval = interval
+        self.path = None
+        self.signature = None
+
+        self.root.after(self.interval, self.poll)
+
+
+    def watch(self, path):
+        """Start watching a file, replacing the previously watched one.
+
+        Also call this after the editor writes the file itself, so its
+        own save is not reported as an external change.
+
+        Args:
+            path (str): The path of the file to watch, or None to stop.
+        """
+        self.path = path
+        self.signature = self.stat_signature()
+
+
+    def stat_signature(self):
+        """Return the (mtime, size, inode) of the watched file, or None."""
+        if self.path is None:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+    def poll(self):
+        """Check the watched file and call change_callback if it changed."""
+        # Keep polling even if the callback fails
+        try:
+            signature = self.stat_signature()
+            # A missing file (e.g. mid-rewrite) is not reported as a change
+            if signature is not None and signature != self.signature:
+                self.signature = signature
+                self.change_callback(self.path)
+        finally:
+            self.root.after(self.interval, self.poll)
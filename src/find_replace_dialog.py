@@ -92,17 +92,20 @@ class FindReplaceDialog(tk.Toplevel):
     def replace(self):
         """Replace the current occurrence of the search text with the replace text."""
         current_pos = self.text_area.index("search.first")
-        self.text_area.delete("search.first", "search.last")
-        self.text_area.insert(current_pos, self.replace_var.get())
+        with self.text_area.undo_history.group():
+            self.text_area.delete("search.first", "search.last")
+            self.text_area.insert(current_pos, self.replace_var.get())
         self.find_next()
 
     
     def replace_all(self):
         """Replace all occurrences of the search text with the replace text."""
         count = 0
-        while self.find_next():
-            self.replace()
-            count += 1
+        # Record every replacement as one undo entry
+        with self.text_area.undo_history.group():
+            while self.find_next():
+                self.replace()
+                count += 1
         tk.messagebox.showinfo("Replace All", f"Replaced {count} occurrences.")
 
     
@@ -0,0 +1,47 @@
+"""HighlightStyle module for the PyEd text editor application.
+
+This module holds the lexer setup and theme colors shared by the
+SyntaxHighlightedText widget and the batch export. It does not import
+tkinter, so worker processes and the command-line export can use it
+without loading Tk.
+"""
+
+from pygments.lexers import get_lexer_by_name
+
+def create_lexer():
+    """Return the lexer used for syntax highlighting."""
+    # stripnl would shift token offsets for files starting with blank lines
+    return get_lexer_by_name("python", stripnl=False)
+
+
+# Fixes an error where tkinter doesn't recognize color
+# names without a hash
+def format_color(color):
+    """Format a color string to include a hash if it doesn't have one.
+    
+    Args:
+        color (str): The color string to format.
+    """
+    if color and not color.startswith('#'): 
+        color = f'#{color}'
+    return color
+
+
+def style_table(style):
+    """Return the foreground, background and boldness of every token.
+
+    Args:
+        style (pygments.style.Style): The style to read the colors from.
+
+    Returns:
+        dict: (fg, bg, bold) tuples keyed by token tag name.
+    """
+    table = {}
+    for token, token_style in style:
+        # Unhandled tokens get default colors
+        fg = format_color(
+            token_style['color']) if 'color' in token_style else "#000000"
+        bg = format_color(
+            token_style['bgcolor']) if 'bgcolor' in token_style else "#ffffff"
+        table[str(token)] = (fg, bg, bool(token_style.get('bold')))
+    return table
@@ -1,10 +1,32 @@
-import tkinter as tk
-from editor_gui import EditorGUI
+import os
+import sys
+from single_instance import forward_paths, InstanceServer
 
 def main():
+    # Headless batch export, see batch_export.py
+    if any(arg.startswith("--export") for arg in sys.argv[1:]):
+        from batch_export import main as export_main
+        sys.exit(export_main(sys.argv[1:]))
+
+    paths = [os.path.abspath(path) for path in sys.argv[1:]]
+
+    # Hand the paths to a running editor and exit without starting Tk
+    running = forward_paths(paths)
+    if running and paths:
+        return
+
+    import tkinter as tk
+    from editor_gui import EditorGUI
+
     root = tk.Tk()
     editor = EditorGUI(root)
+    editor.open_paths(paths)
+
+    # Only the first editor serves later launches
+    server = None if running else InstanceServer(root, editor.open_paths)
     root.mainloop()
+    if server:
+        server.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,179 @@
+"""Parallel lexing module for the PyEd text editor application.
+
+This module lexes very large Python files across several processes. The
+document is split at top-level def/class/decorator lines outside of
+triple-quoted strings, where the lexer is back in its root state, and
+the chunks are lexed in a ProcessPoolExecutor. Each chunk is checked
+after lexing; if a split turns out to be unsafe the whole document is
+lexed serially instead, so the result always matches a serial lex.
+"""
+
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pygments.lexers import get_lexer_by_name
+from token_cache import lex_runs
+
+# Documents smaller than this are lexed serially
+PARALLEL_MIN_SIZE = 512 * 1024
+
+# Chunks are made at least this large to keep the overhead down
+MIN_CHUNK_SIZE = 64 * 1024
+
+# Top-level lines the lexer is known to start in its root state
+SPLIT_LINE = re.compile(r"(?:async\s+def|def|class)\s|@")
+
+# Triple quotes, plus the single-quoted strings and comments that can
+# contain quote characters without opening a multi-line string
+QUOTE_SCAN = re.compile(
+    r'''("""|\'\'\')|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|#.*''')
+
+executor = None
+worker_lexers = {}
+
+def get_executor():
+    """Return the shared process pool, creating it on first use."""
+    global executor
+    if executor is None:
+        # spawn keeps the workers clear of Tk and any running threads
+        executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"))
+    return executor
+
+
+def shutdown_executor():
+    """Shut down the shared process pool so the next use creates a new one."""
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+
+
+def lex_chunk(text, lexer_name, options):
+    """Lex a chunk in a worker process.
+
+    Returns the chunk's runs and whether the chunk ended with the lexer
+    back in its root state. A chunk that ends inside a string lexes its
+    final newline as part of the string, which marks the split unsafe.
+
+    Args:
+        text (str): The chunk to lex.
+        lexer_name (str): The name of the lexer to use.
+        options (dict): The options the lexer was created with.
+    """
+    key = (lexer_name, tuple(sorted(options.items())))
+    if key not in worker_lexers:
+        worker_lexers[key] = get_lexer_by_name(lexer_name, **options)
+
+    runs = lex_runs(text, worker_lexers[key])
+    safe = bool(runs) and runs[-1][0] in ("Token.Text", "Token.Text.Whitespace")
+    return runs, safe
+
+
+def find_split_points(content, target_size):
+    """Return offsets where content can be split for parallel lexing.
+
+    Only lines at the start of a top-level def, class or decorator block
+    that are not inside a triple-quoted string are used.
+
+    Args:
+        content (str): The document to split.
+        target_size (int): The preferred size of each chunk.
+    """
+    points = []
+    open_quote = None
+    previous_split_line = False
+    last_point = 0
+    offset = 0
+    # Only "\n" ends a line for the lexer; splitlines() also breaks on
+    # form feeds and other separators
+    lines = content.split("\n")
+    for i, line in enumerate(lines):
+        if i < len(lines) - 1:
+            line += "\n"
+        split_line = open_quote is None and SPLIT_LINE.match(line) is not None
+        # Never split between a decorator and what it decorates
+        if (split_line and not previous_split_line
+                and offset - last_point >= target_size):
+            points.append(offset)
+            last_point = offset
+        previous_split_line = split_line and line.startswith("@")
+
+        open_quote = scan_quotes(line, open_quote)
+        offset += len(line)
+    return points
+
+
+def scan_quotes(line, open_quote):
+    """Return the triple quote still open at the end of a line, if any.
+
+    Args:
+        line (str): The line to scan.
+        open_quote (str): The triple quote open at the start of the line.
+    """
+    pos = 0
+    while True:
+        if open_quote is not None:
+            end = line.find(open_quote, pos)
+            if end < 0:
+                return open_quote
+            pos = end + 3
+            open_quote = None
+
+        match = QUOTE_SCAN.search(line, pos)
+        if match is None:
+            return None
+        if match.group(1):
+            open_quote = match.group(1)
+        pos = match.end()
+
+
+def parallel_lex_runs(content, lexer):
+    """Lex content into (tag name, length) runs, in parallel if it is large.
+
+    Args:
+        content (str): The text to lex.
+        lexer (pygments.lexer.Lexer): The lexer to use.
+    """
+    workers = os.cpu_count() or 1
+    if (len(content) < PARALLEL_MIN_SIZE or workers < 2
+            or "python" not in lexer.aliases):
+        return lex_runs(content, lexer)
+
+    target_size = max(MIN_CHUNK_SIZE, len(content) // (workers * 4))
+    points = find_split_points(content, target_size)
+    if not points:
+        return lex_runs(content, lexer)
+
+    bounds = [0] + points + [len(content)]
+    chunks = [content[start:end] for start, end in zip(bounds, bounds[1:])]
+    try:
+        results = list(get_executor().map(
+            lex_chunk, chunks,
+            [lexer.aliases[0]] * len(chunks), [lexer.options] * len(chunks)))
+    except BrokenProcessPool:
+        # A worker died, e.g. killed for memory; start a new pool next time
+        shutdown_executor()
+        return lex_runs(content, lexer)
+    except Exception:
+        return lex_runs(content, lexer)
+
+    runs = []
+    for i, ((chunk_runs, safe), chunk) in enumerate(zip(results, chunks)):
+        # The last chunk may end anywhere and get a newline appended by
+        # the lexer; the others must end in root state and keep their length
+        total = sum(length for _, length in chunk_runs)
+        if i < len(chunks) - 1:
+            if not safe or total != len(chunk):
+                return lex_runs(content, lexer)
+        elif total - len(chunk) not in (0, 1):
+            return lex_runs(content, lexer)
+        if runs and chunk_runs and runs[-1][0] == chunk_runs[0][0]:
+            runs[-1] = (runs[-1][0], runs[-1][1] + chunk_runs[0][1])
+            chunk_runs = chunk_runs[1:]
+        runs.extend(chunk_runs)
+    return runs
@@ -0,0 +1,165 @@
+"""Single-instance module for the PyEd text editor application.
+
+This module lets a running editor open files passed to later launches.
+The running editor listens on a Unix domain socket; a new launch first
+tries to hand its file and folder arguments to that socket and exits if
+this succeeds. The client side only needs a few standard modules, so it
+runs before tkinter and pygments are imported and costs milliseconds.
+"""
+
+import os
+import queue
+import socket
+import threading
+from stat import S_ISDIR
+
+# Seconds a client waits for the running editor to answer
+CLIENT_TIMEOUT = 2
+
+def socket_path():
+    """Return the path of the socket the running editor listens on.
+
+    The socket lives in a directory only the current user can access:
+    XDG_RUNTIME_DIR if it is set, otherwise a pyed-<uid> folder in the
+    temporary directory that is created with mode 0700.
+
+    Returns:
+        str: The socket path, or None if no private directory is available.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "pyed.sock")
+
+    directory = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"pyed-{os.getuid()}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+
+    # Another user could have created the folder first
+    try:
+        stat = os.lstat(directory)
+    except OSError:
+        return None
+    if (not S_ISDIR(stat.st_mode) or stat.st_uid != os.getuid()
+            or stat.st_mode & 0o077):
+        return None
+    return os.path.join(directory, "pyed.sock")
+
+
+def forward_paths(paths):
+    """Send paths to a running editor.
+
+    Calling this with no paths only checks whether an editor is running.
+
+    Args:
+        paths (list): Absolute paths of the files and folders to open.
+
+    Returns:
+        bool: True if a running editor accepted the paths.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    path = socket_path()
+    if path is None:
+        return False
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CLIENT_TIMEOUT)
+            client.connect(path)
+            # fsencode keeps paths that aren't valid UTF-8 intact
+            client.sendall(b"\0".join(os.fsencode(p) for p in paths))
+            client.shutdown(socket.SHUT_WR)
+            return client.recv(2) == b"ok"
+    except OSError:
+        return False
+
+
+class InstanceServer:
+    def __init__(self, root, open_callback):
+        """__init__ method for InstanceServer class.
+
+        Listens for paths from later launches on a background thread and
+        passes them to open_callback on the Tk thread.
+
+        Args:
+            root (tk.Tk): The root window, used to schedule callbacks.
+            open_callback (callable): Called with the list of paths to open.
+        """
+        self.root = root
+        self.open_callback = open_callback
+        self.requests = queue.Queue()
+        self.server = None
+
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        self.path = socket_path()
+        if self.path is None:
+            return
+
+        # Nothing answered on the socket, so any file left there is stale.
+        # If the socket can't be set up the editor just runs without it.
+        try:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(self.path)
+            os.chmod(self.path, 0o600)
+            self.server.listen()
+        except OSError:
+            if self.server is not None:
+                self.server.close()
+                self.server = None
+            return
+
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        self.root.after(100, self.process_requests)
+
+
+    def accept_loop(self):
+        """Accept connections and queue the paths they send."""
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            with connection:
+                connection.settimeout(CLIENT_TIMEOUT)
+                data = b""
+                try:
+                    while chunk := connection.recv(4096):
+                        data += chunk
+                    paths = [os.fsdecode(p) for p in data.split(b"\0") if p]
+                    connection.sendall(b"ok")
+                except (OSError, ValueError):
+                    # Without "ok" the client opens the paths itself
+                    continue
+                if paths:
+                    self.requests.put(paths)
+
+
+    def process_requests(self):
+        """Open queued paths on the Tk thread."""
+        while not self.requests.empty():
+            self.open_callback(self.requests.get())
+            # Bring the editor to the front
+            self.root.deiconify()
+            self.root.lift()
+            self.root.focus_force()
+        self.root.after(100, self.process_requests)
+
+
+    def close(self):
+        """Stop listening and remove the socket."""
+        if self.server is None:
+            return
+        self.server.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -8,10 +8,35 @@ The class uses the pygments library to perform syntax highlighting and supports
 changing the theme of the syntax highlighting.
 """
 
+import difflib
+import queue
+import threading
 import tkinter as tk
+import pyperclip
 from pygments import lex
-from pygments.lexers import get_lexer_by_name
 from pygments.styles import get_style_by_name
+from undo_history import UndoHistory
+from token_cache import TokenCache, iter_runs
+from parallel_lexer import parallel_lex_runs
+from highlight_style import create_lexer, style_table
+
+# Lines longer than this put the widget into long-line mode
+LONG_LINE_THRESHOLD = 10000
+
+# Columns of each line that are highlighted in long-line mode
+HIGHLIGHT_COLUMN_BUDGET = 2000
+
+# Width of the pieces long lines are split into when shown chunked
+LONG_LINE_CHUNK_WIDTH = 1000
+
+# Pastes larger than this are inserted in chunks of this many characters
+PASTE_CHUNK_SIZE = 64 * 1024
+
+# Changed regions with more lines than this are not diffed on reload
+MAX_DIFF_LINES = 20000
+
+# Milliseconds to wait for pyperclip before falling back to Tk's clipboard
+CLIPBOARD_TIMEOUT = 3000
 
 class SyntaxHighlightedText(tk.Text):
     def __init__(self, master=None, theme="default", **kwargs):
@@ -25,68 +50,434 @@ class SyntaxHighlightedText(tk.Text):
         super().__init__(master, **kwargs)
         self.theme = theme
         self.highlighting = False
+        self.pasting = False
+        self.paste_callback = None
+        self.long_line_mode = False
+        self.column_budget = None
+        self.read_only = False
         self.configure(font=('Consolas', 10))
 
-        self.lexer = get_lexer_by_name("python")
+        self.lexer = create_lexer()
         self.style = get_style_by_name(self.theme)
+        self.token_cache = TokenCache()
+
+        # Route the Tcl widget command through proxy() so edits made by
+        # Tk's own bindings are seen as well
+        self.orig = self._w + "_orig"
+        self.tk.call("rename", self._w, self.orig)
+        self.tk.createcommand(self._w, self.proxy)
+        self.undo_history = UndoHistory(self)
+
+        self.bind("<<Paste>>", self.paste)
+        self.bind("<Control-v>", self.paste)
 
         self.setup_tags()
 
+
+    def proxy(self, command, *args):
+        """Handle a call of the Tcl widget command.
+
+        Args:
+            command (str): The widget subcommand.
+            *args: The arguments of the subcommand.
+        """
+        # Tk's undo doesn't restore the soft_break tag, so edits to a
+        # chunked view could put real line breaks into the file
+        if self.read_only and (
+                command in ("insert", "delete")
+                or command == "edit" and args[:1] in (("undo",), ("redo",))):
+            return ""
+        if command in ("insert", "delete", "edit"):
+            return self.undo_history.run(command, args)
+        return self.orig_call(command, *args)
+
+
+    def orig_call(self, command, *args):
+        """Call the original Tcl widget command, bypassing proxy().
+
+        Args:
+            command (str): The widget subcommand.
+            *args: The arguments of the subcommand.
+        """
+        return self.tk.call(self.orig, command, *args)
+
+
+    def paste(self, event=None):
+        """Paste the clipboard as a single undo entry.
+
+        Large payloads are inserted in chunks that yield to the event loop.
+        Highlighting is suspended until the paste completes, after which
+        only the pasted lines are re-highlighted and paste_callback is
+        called.
+
+        Args:
+            event (tk.Event): The event that triggered the paste
+        """
+        if self.pasting or self.read_only:
+            return "break"
+        self.pasting = True
+
+        # When this app owns the clipboard, pyperclip's xclip/xsel would
+        # wait for Tk to answer while Tk waits for them, so ask Tk directly
+        owner = self.tk.call(
+            "selection", "own", "-selection", "CLIPBOARD", "-displayof", self._w)
+        if owner:
+            self.start_paste(self.tk_clipboard())
+            return "break"
+
+        # pyperclip may run an external program, so keep it off the Tk thread
+        result = queue.Queue()
+        threading.Thread(
+            target=lambda: result.put(self.read_clipboard()), daemon=True).start()
+        self.wait_for_clipboard(result, CLIPBOARD_TIMEOUT)
+        return "break"
+
+
+    def read_clipboard(self):
+        """Read the clipboard through pyperclip, or None if it can't.
+
+        Runs on a background thread, so it must not touch Tk.
+        """
+        try:
+            return pyperclip.paste()
+        except pyperclip.PyperclipException:
+            return None
+
+
+    def tk_clipboard(self):
+        """Return the clipboard as seen by Tk, or "" if it is empty."""
+        try:
+            return self.clipboard_get()
+        except tk.TclError:
+            return ""
+
+
+    def wait_for_clipboard(self, result, remaining):
+        """Start the paste once the background clipboard read has finished.
+
+        Args:
+            result (queue.Queue): Receives the text read by pyperclip.
+            remaining (int): Milliseconds left before giving up on pyperclip.
+        """
+        try:
+            text = result.get_nowait()
+        except queue.Empty:
+            if remaining > 0:
+                self.after(20, self.wait_for_clipboard, result, remaining - 20)
+                return
+            text = None
+
+        # No clipboard mechanism for pyperclip or it timed out, use Tk's
+        self.start_paste(self.tk_clipboard() if text is None else text)
+
+
+    def start_paste(self, text):
+        """Insert text read from the clipboard at the cursor.
+
+        Args:
+            text (str): The clipboard contents.
+        """
+        text = text.replace("\r\n", "\n")
+        if not text:
+            self.pasting = False
+            return
+
+        self.undo_history.begin_group()
+        if self.tag_ranges("sel"):
+            self.delete("sel.first", "sel.last")
+
+        # paste_start stays before and paste_end after the pasted text
+        self.mark_set("paste_start", "insert")
+        self.mark_gravity("paste_start", "left")
+        self.mark_set("paste_end", "insert")
+        self.paste_chunk(text, 0)
+
+
+    def paste_chunk(self, text, offset):
+        """Insert the next chunk of a paste and schedule the one after.
+
+        Args:
+            text (str): The text being pasted.
+            offset (int): The offset of the chunk to insert.
+        """
+        self.config(state="normal")
+        self.insert("paste_end", text[offset:offset + PASTE_CHUNK_SIZE])
+        offset += PASTE_CHUNK_SIZE
+        if offset < len(text):
+            # Block typing while the remaining chunks are inserted
+            self.config(state="disabled")
+            self.after(1, self.paste_chunk, text, offset)
+            return
+
+        self.undo_history.end_group()
+        self.mark_set("insert", "paste_end")
+        self.see("insert")
+        self.pasting = False
+        self.highlight_range("paste_start", "paste_end")
+        if self.paste_callback:
+            self.paste_callback()
+
+
+    def highlight_range(self, start, end):
+        """Re-highlight the lines between two indices.
+
+        Args:
+            start (str): An index on the first line to highlight.
+            end (str): An index on the last line to highlight.
+        """
+        if self.highlighting or self.pasting:
+            return
+        self.highlighting = True
+        try:
+            first = int(self.index(start).split(".")[0])
+            last = int(self.index(end).split(".")[0])
+            content = self.get(f"{first}.0", f"{last}.0 lineend")
+            if self.column_budget is not None:
+                content = self.truncate_lines(content, first)
+
+            for tag in self.tag_names():
+                if tag.startswith("Token"):
+                    self.tag_remove(tag, f"{first}.0", f"{last}.0 lineend")
+
+            self.apply_tokens(lex(content, self.lexer), first)
+        finally:
+            self.highlighting = False
+
     
     def setup_tags(self):
         """Setup tags for the SyntaxHighlightedText widget."""
         base_font = self.cget("font") # Overrides default theme font
-        for token, style in self.style:
-            # Unhandled tokens get default colors
-            fg = self.format_color(
-                style['color']) if 'color' in style else "#000000"
-            bg = self.format_color(
-                style['bgcolor']) if 'bgcolor' in style else "#ffffff"
-            font = base_font + " bold" if style.get('bold') else base_font
+        for token, (fg, bg, bold) in style_table(self.style).items():
+            font = base_font + " bold" if bold else base_font
             self.tag_configure(
-                str(token), foreground=fg, background=bg, font=font)
+                token, foreground=fg, background=bg, font=font)
 
         # Light/Dark theme background color    
         bg_color = self.style.background_color
         self.config(bg=bg_color)
 
     
-    # Fixes an error where tkinter doesn't recognize color
-    # names without a hash
-    def format_color(self, color):
-        """Format a color string to include a hash if it doesn't have one.
-        
-        Args:
-            color (str): The color string to format.
-        """
-        if color and not color.startswith('#'): 
-            color = f'#{color}'
-        return color
-
-    
-    def highlight(self, event=None):
+    def highlight(self, event=None, initial=False):
         """Highlight the text in the SyntaxHighlightedText widget.
         
         Args:
             event (tk.Event): The event that triggered the highlight
+            initial (bool): Whether this is the first highlight of an opened
+                file, which uses the token cache and parallel lexing.
         """
-        if self.highlighting:
+        if self.highlighting or self.pasting:
             return
         self.highlighting = True
+        # Always clear the flag, or a failed run would stop all highlighting
+        try:
+            content = self.get("1.0", "end-1c")
+            if self.column_budget is not None:
+                content = self.truncate_lines(content)
 
-        content = self.get("1.0", "end-1c")
-        self.mark_set("range_start", "1.0")
+            for tag in self.tag_names():
+                if tag.startswith("Token"):
+                    self.tag_remove(tag, "1.0", "end")
 
-        for tag in self.tag_names():
-            self.tag_remove(tag, "1.0", "end")
+            if initial:
+                runs = self.token_cache.get(content, self.lexer)
+                if runs is None:
+                    runs = parallel_lex_runs(content, self.lexer)
+                    self.token_cache.put(content, self.lexer, runs)
+                self.apply_tokens(iter_runs(content, runs))
+            else:
+                self.apply_tokens(lex(content, self.lexer))
 
-        for token, content in lex(content, self.lexer):
-            self.mark_set("range_end", f"range_start + {len(content)}c")
-            self.tag_add(str(token), "range_start", "range_end")
-            self.mark_set("range_start", "range_end")
+            self.edit_modified(False)
+        finally:
+            self.highlighting = False
 
-        self.edit_modified(False)
-        self.highlighting = False
+
+    def apply_tokens(self, tokens, line=1):
+        """Tag a stream of (token, text) pairs starting at a line.
+
+        Tokens are placed by line/column so truncated lines stay aligned.
+
+        Args:
+            tokens (iterable): The (token, text) pairs to apply.
+            line (int): The line the first token starts on.
+        """
+        col = 0
+        for token, content in tokens:
+            newlines = content.count("\n")
+            if newlines:
+                end_line = line + newlines
+                end_col = len(content) - content.rfind("\n") - 1
+            else:
+                end_line, end_col = line, col + len(content)
+            self.tag_add(str(token), f"{line}.{col}", f"{end_line}.{end_col}")
+            line, col = end_line, end_col
+
+
+    def truncate_lines(self, content, first_line=1):
+        """Cut every line of content down to the column budget.
+
+        Continuation chunks of a line shown in chunked form are
+        dropped entirely, so only the start of a long line is lexed.
+
+        Args:
+            content (str): The text to truncate.
+            first_line (int): The widget line content starts on.
+        """
+        continuations = {
+            int(str(index).split(".")[0]) + 1
+            for index in self.tag_ranges("soft_break")[0::2]}
+        lines = content.split("\n")
+        for i, line in enumerate(lines, start=first_line):
+            if i in continuations:
+                lines[i - first_line] = ""
+            elif len(line) > self.column_budget:
+                lines[i - first_line] = line[:self.column_budget]
+        return "\n".join(lines)
+
+
+    def set_long_line_mode(self, enabled, column_budget=HIGHLIGHT_COLUMN_BUDGET):
+        """Switch the lightweight display mode for very long lines on or off.
+
+        In long-line mode only the first column_budget characters of each
+        line are highlighted and wrapping is turned off, so Tk does not
+        have to lay out thousands of display lines per logical line.
+        A read-only chunked view is made editable again.
+
+        Args:
+            enabled (bool): Whether long-line mode should be active.
+            column_budget (int): Number of columns highlighted per line.
+        """
+        self.long_line_mode = enabled
+        self.read_only = False
+        self.column_budget = column_budget if enabled else None
+        self.config(wrap="none" if enabled else "char")
+
+
+    def insert_chunked(self, index, text, width=LONG_LINE_CHUNK_WIDTH):
+        """Insert text, breaking lines longer than width into chunks.
+
+        The breaks are tagged "soft_break" so get_content() can drop them
+        again and the file saves back unchanged. Tk's undo would not bring
+        the tag back, so the widget is read-only while it shows breaks;
+        set_long_line_mode() makes it editable again.
+
+        Args:
+            index (str): The index to insert the text at.
+            text (str): The text to insert.
+            width (int): The maximum length of a displayed chunk.
+        """
+        # A right-gravity mark keeps successive inserts in order
+        self.mark_set("chunk_insert", index)
+        pending = []
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                pending.append("\n")
+            if len(line) <= width:
+                pending.append(line)
+                continue
+
+            # Flush the short lines gathered so far in one insert
+            self.insert("chunk_insert", "".join(pending))
+            pending = []
+            for start in range(0, len(line), width):
+                if start:
+                    self.insert("chunk_insert", "\n", "soft_break")
+                self.insert("chunk_insert", line[start:start + width])
+        self.insert("chunk_insert", "".join(pending))
+        self.mark_unset("chunk_insert")
+        self.read_only = bool(self.tag_ranges("soft_break"))
+
+
+    def get_content(self):
+        """Return the text of the widget without chunking soft breaks."""
+        ranges = self.tag_ranges("soft_break")
+        if not ranges:
+            return self.get("1.0", "end-1c")
+
+        pieces = []
+        previous = "1.0"
+        for start, end in zip(ranges[0::2], ranges[1::2]):
+            pieces.append(self.get(previous, start))
+            previous = end
+        pieces.append(self.get(previous, "end-1c"))
+        return "".join(pieces)
+
+
+    def apply_diff(self, text):
+        """Replace the widget's text with text, touching only changed lines.
+
+        The new text is diffed against the widget line by line and only
+        the changed hunks are deleted and inserted, as a single undo
+        entry. Unchanged lines keep their tags and marks, and only the
+        changed hunks are re-highlighted.
+
+        Args:
+            text (str): The new text of the widget.
+
+        Returns:
+            bool: False if the change was too large to diff, in which case
+                the widget is left untouched.
+        """
+        old_lines = self.get("1.0", "end-1c").split("\n")
+        new_lines = text.split("\n")
+        # Give every line but the last its newline, as in the widget
+        old_lines = [line + "\n" for line in old_lines[:-1]] + old_lines[-1:]
+        new_lines = [line + "\n" for line in new_lines[:-1]] + new_lines[-1:]
+
+        # Only diff what lies between the common prefix and suffix
+        prefix = 0
+        limit = min(len(old_lines), len(new_lines))
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix
+               and old_lines[-1 - suffix] == new_lines[-1 - suffix]):
+            suffix += 1
+        old_middle = old_lines[prefix:len(old_lines) - suffix]
+        new_middle = new_lines[prefix:len(new_lines) - suffix]
+        if max(len(old_middle), len(new_middle)) > MAX_DIFF_LINES:
+            return False
+
+        # autojunk keeps repeated lines like blank ones from making this quadratic
+        matcher = difflib.SequenceMatcher(None, old_middle, new_middle)
+        hunks = [
+            (i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+            for op, i1, i2, j1, j2 in matcher.get_opcodes() if op != "equal"]
+
+        # Apply bottom-up so the line numbers of earlier hunks stay valid
+        with self.undo_history.group():
+            for i1, i2, j1, j2 in reversed(hunks):
+                end = f"{i2 + 1}.0" if i2 < len(old_lines) else "end-1c"
+                self.delete(f"{i1 + 1}.0", end)
+                self.insert(f"{i1 + 1}.0", "".join(new_lines[j1:j2]))
+
+        for _, _, j1, j2 in hunks:
+            self.highlight_range(f"{j1 + 1}.0", f"{max(j2, j1 + 1)}.0")
+        return True
+
+
+    def show_diagnostics(self, diagnostics):
+        """Underline the ranges of a list of diagnostics.
+
+        Args:
+            diagnostics (list): (line, column, severity, message) tuples.
+        """
+        for severity, color in (("error", "red"), ("warning", "orange")):
+            tag = f"diagnostic_{severity}"
+            self.tag_remove(tag, "1.0", "end")
+            try:
+                self.tag_configure(tag, underline=True, underlinefg=color)
+            except tk.TclError:
+                # underlinefg needs Tk 8.6.11 or newer
+                self.tag_configure(tag, underline=True)
+
+        for line, col, severity, _ in diagnostics:
+            start = f"{line}.{col}"
+            end = f"{start} wordend"
+            # Nothing to underline at the end of a line, mark the line instead
+            if self.compare(start, ">=", f"{start} lineend"):
+                start, end = f"{line}.0", f"{line}.0 lineend"
+            self.tag_add(f"diagnostic_{severity}", start, end)
 
 
     def change_theme(self, theme):
@@ -8,18 +8,51 @@ class TextEditor:
         """__init__ method for TextEditor class."""
         self.current_file = None
         self.text_buffer = ""
+        self.newline = "\n"
+
+        # The file as read, written back as-is while the buffer is unchanged
+        self.original_text = None
+        self.original_buffer = None
 
     
     def open_file(self, file_path: str) -> None:
-        """Open a file and read its contents into the text buffer."""
-        with open(file_path, "r", encoding="utf8") as file:
+        """Open a file and read its contents into the text buffer.
+
+        All line endings are normalized to "\\n" in the buffer and the most
+        common one is remembered for saving. While the buffer is unchanged,
+        saving writes the original text back, so the file stays
+        byte-identical even if it mixes line endings.
+        """
+        with open(file_path, "r", encoding="utf8", newline="") as file:
             self.current_file = file_path
-            self.text_buffer = file.read()
+            text = file.read()
+
+        crlf = text.count("\r\n")
+        counts = {
+            "\n": text.count("\n") - crlf,
+            "\r\n": crlf,
+            "\r": text.count("\r") - crlf}
+        # Ties go to "\n", the first key
+        self.newline = max(counts, key=counts.get)
+        self.text_buffer = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        self.original_text = text
+        self.original_buffer = self.text_buffer
+
+
+    def longest_line_length(self) -> int:
+        """Return the length of the longest line in the text buffer."""
+        return max(map(len, self.text_buffer.split("\n")), default=0)
 
     
     def save_file_as(self, file_path: str) -> None:
         """Save the text buffer to a file."""
-        with open(file_path, "w", encoding="utf8") as file:
+        if self.text_buffer == self.original_buffer:
+            text, newline = self.original_text, ""
+        else:
+            text, newline = self.text_buffer, self.newline
+
+        with open(file_path, "w", encoding="utf8", newline=newline) as file:
             self.current_file = file_path
-            file.write(self.text_buffer)
+            file.write(text)
 
@@ -0,0 +1,223 @@
+"""TokenCache module for the PyEd text editor application.
+
+This module provides the TokenCache class, which stores the token ranges
+computed by pygments on local disk so a file that was highlighted before
+can be highlighted again without lexing it. Entries are keyed by a hash
+of the content plus the lexer name and pygments version, and the cache
+is kept under a size limit by evicting the least recently used entries.
+"""
+
+import hashlib
+import os
+import shutil
+import struct
+import zlib
+from array import array
+
+import pygments
+from pygments import lex
+
+# Bump when the on-disk format changes
+CACHE_FORMAT_VERSION = 1
+
+# Default size limit of the cache directory in bytes
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Content smaller than this is quick enough to lex and is not cached
+MIN_CACHED_SIZE = 32 * 1024
+
+def default_cache_dir():
+    """Return the directory the token cache is stored in."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyed", "tokens")
+
+
+def lex_runs(content, lexer):
+    """Lex content and return its tokens as (tag name, length) runs.
+
+    Neighbouring tokens of the same type are merged into one run.
+
+    Args:
+        content (str): The text to lex.
+        lexer (pygments.lexer.Lexer): The lexer to use.
+    """
+    runs = []
+    for token, text in lex(content, lexer):
+        name = str(token)
+        if runs and runs[-1][0] == name:
+            runs[-1] = (name, runs[-1][1] + len(text))
+        else:
+            runs.append((name, len(text)))
+    return runs
+
+
+def iter_runs(content, runs):
+    """Turn (tag name, length) runs back into (tag name, text) pairs.
+
+    Args:
+        content (str): The text the runs were computed for.
+        runs (list): The (tag name, length) runs.
+    """
+    offset = 0
+    for name, length in runs:
+        yield name, content[offset:offset + length]
+        offset += length
+
+
+class TokenCache:
+    def __init__(self, cache_dir=None, max_bytes=MAX_CACHE_BYTES):
+        """__init__ method for TokenCache class.
+
+        Args:
+            cache_dir (str): The directory to store the cache in.
+            max_bytes (int): The size limit of the cache in bytes.
+        """
+        root = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.join(root, f"pygments-{pygments.__version__}")
+        self.remove_stale_versions(root)
+
+
+    def remove_stale_versions(self, root):
+        """Delete cache directories written by other pygments versions.
+
+        Args:
+            root (str): The directory holding the per-version directories.
+        """
+        if not os.path.isdir(root):
+            return
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if path != self.cache_dir and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+    def key(self, content, lexer):
+        """Return the cache key for content lexed by lexer.
+
+        Args:
+            content (str): The text that is lexed.
+            lexer (pygments.lexer.Lexer): The lexer used.
+        """
+        digest = hashlib.sha256(
+            f"{lexer.name}\0{pygments.__version__}\0{CACHE_FORMAT_VERSION}\0".encode())
+        digest.update(content.encode("utf8", "surrogatepass"))
+        return digest.hexdigest()
+
+
+    def get(self, content, lexer):
+        """Return the cached runs for content, or None on a miss.
+
+        Args:
+            content (str): The text that is lexed.
+            lexer (pygments.lexer.Lexer): The lexer used.
+        """
+        if len(content) < MIN_CACHED_SIZE:
+            return None
+
+        path = os.path.join(self.cache_dir, self.key(content, lexer))
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        try:
+            runs = self.decode(zlib.decompress(data))
+        except Exception:
+            runs = None
+        # The lexer may add one trailing newline to the content
+        if runs is not None and sum(length for _, length in runs) - len(content) not in (0, 1):
+            runs = None
+        if runs is None:
+            # A corrupt or foreign entry counts as a miss and is removed
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return runs
+
+
+    def put(self, content, lexer, runs):
+        """Store the runs for content and evict old entries if needed.
+
+        Args:
+            content (str): The text that was lexed.
+            lexer (pygments.lexer.Lexer): The lexer used.
+            runs (list): The (tag name, length) runs to store.
+        """
+        if len(content) < MIN_CACHED_SIZE:
+            return
+
+        path = os.path.join(self.cache_dir, self.key(content, lexer))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                file.write(zlib.compress(self.encode(runs)))
+            os.replace(path + ".tmp", path)
+            self.evict()
+        except OSError:
+            pass
+
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+    def encode(self, runs):
+        """Pack runs into the binary cache format.
+
+        The format is a table of the tag names followed by an array of
+        (name index, length) pairs.
+
+        Args:
+            runs (list): The (tag name, length) runs.
+        """
+        names = {}
+        pairs = array("I")
+        for name, length in runs:
+            pairs.append(names.setdefault(name, len(names)))
+            pairs.append(length)
+
+        table = "\n".join(names).encode("utf8")
+        return struct.pack("=II", CACHE_FORMAT_VERSION, len(table)) + table + pairs.tobytes()
+
+
+    def decode(self, data):
+        """Unpack runs from the binary cache format.
+
+        Args:
+            data (bytes): The data written by encode().
+        """
+        version, table_size = struct.unpack_from("=II", data)
+        if version != CACHE_FORMAT_VERSION:
+            return None
+
+        offset = struct.calcsize("=II")
+        names = data[offset:offset + table_size].decode("utf8").split("\n")
+        pairs = array("I")
+        pairs.frombytes(data[offset + table_size:])
+        if len(pairs) % 2:
+            return None
+        return [(names[pairs[i]], pairs[i + 1]) for i in range(0, len(pairs), 2)]
@@ -0,0 +1,237 @@
+"""UndoHistory module for the PyEd text editor application.
+
+This module provides the UndoHistory class, which manages the undo stack
+of a SyntaxHighlightedText widget. Tk's own undo stack does the actual
+undoing; UndoHistory decides where the separators go, so typing is
+grouped into words and bulk operations into a single entry, and keeps an
+estimate of how much memory the history holds so it can be trimmed to a
+budget.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+
+# Default number of undo entries kept
+MAX_UNDO_ENTRIES = 1000
+
+# Default memory budget for the undo history in bytes
+MAX_UNDO_BYTES = 16 * 1024 * 1024
+
+# Rough per-action cost of Tk's undo bookkeeping in bytes
+ACTION_OVERHEAD = 200
+
+class UndoHistory:
+    def __init__(self, text, max_entries=MAX_UNDO_ENTRIES, max_bytes=MAX_UNDO_BYTES):
+        """__init__ method for UndoHistory class.
+
+        Args:
+            text (SyntaxHighlightedText): The text widget whose history is managed.
+            max_entries (int): The maximum number of undo entries to keep.
+            max_bytes (int): The memory budget for the history in bytes.
+        """
+        self.text = text
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_change = None
+
+        # Estimated size of each undo entry, oldest first
+        self.undo_sizes = deque()
+        self.redo_sizes = deque()
+        self.memory = 0
+        self.group_open = False
+        self.bulk_depth = 0
+        self.replaying = False
+
+        # State of the last edit, used to coalesce typing
+        self.last_kind = None
+        self.last_char = ""
+        self.last_index = None
+
+        # Separators are placed by this class instead of Tk
+        self.text.configure(autoseparators=False, maxundo=self.max_entries)
+
+
+    @property
+    def entries(self):
+        """The number of entries on the undo stack."""
+        return len(self.undo_sizes)
+
+
+    def run(self, command, args):
+        """Run an insert, delete or edit widget command and track it.
+
+        Args:
+            command (str): The Tcl widget command.
+            args (tuple): The arguments of the widget command.
+        """
+        if command == "edit":
+            return self.run_edit(args)
+
+        # Tk replays undo/redo actions through the widget command
+        if self.replaying:
+            return self.text.orig_call(command, *args)
+
+        if command == "insert":
+            chars = args[1::2]
+            size = sum(len(c.encode("utf8")) for c in chars)
+            self.before_edit("insert", "".join(chars))
+        else:
+            size = len(self.text.orig_call("get", *args).encode("utf8"))
+            self.before_edit("delete", "")
+
+        result = self.text.orig_call(command, *args)
+        if size:
+            self.add(size)
+        self.last_index = self.text.orig_call("index", "insert")
+        return result
+
+
+    def run_edit(self, args):
+        """Run an edit subcommand and keep the tracked stacks in step.
+
+        Args:
+            args (tuple): The arguments of the edit subcommand.
+        """
+        subcommand = args[0] if args else ""
+        self.replaying = subcommand in ("undo", "redo")
+        try:
+            result = self.text.orig_call("edit", *args)
+        finally:
+            self.replaying = False
+
+        if subcommand == "undo":
+            self.close_group()
+            if self.undo_sizes:
+                self.redo_sizes.append(self.undo_sizes.pop())
+        elif subcommand == "redo":
+            self.close_group()
+            if self.redo_sizes:
+                self.undo_sizes.append(self.redo_sizes.pop())
+        elif subcommand == "separator":
+            self.close_group()
+            return result
+        elif subcommand == "reset":
+            self.undo_sizes.clear()
+            self.redo_sizes.clear()
+            self.memory = 0
+            self.group_open = False
+        else:
+            return result
+
+        self.last_kind = None
+        self.notify()
+        return result
+
+
+    def before_edit(self, kind, chars):
+        """Place a separator before an edit if it starts a new group.
+
+        Typing is grouped into words: a new group starts when the kind of
+        edit changes, the cursor has moved, or a word character follows
+        a non-word character. Multi-character inserts are kept on their
+        own. Inside group() everything is recorded as one entry.
+
+        Args:
+            kind (str): "insert" or "delete".
+            chars (str): The inserted text, empty for deletions.
+        """
+        if self.bulk_depth:
+            return
+
+        single = len(chars) <= 1
+        moved = self.text.orig_call("index", "insert") != self.last_index
+        word = chars.isalnum() or chars == "_"
+        last_word = self.last_char.isalnum() or self.last_char == "_"
+        if (kind != self.last_kind or moved or not single
+                or (kind == "insert" and word and not last_word)):
+            self.separator()
+
+        self.last_kind = kind if single else None
+        self.last_char = chars if single else ""
+
+
+    def add(self, size):
+        """Add an action of the given size to the current undo entry.
+
+        Args:
+            size (int): The size of the inserted or deleted text in bytes.
+        """
+        # A new edit discards the redo stack
+        self.memory -= sum(self.redo_sizes)
+        self.redo_sizes.clear()
+
+        if not self.group_open:
+            self.undo_sizes.append(0)
+            self.group_open = True
+        self.undo_sizes[-1] += size + ACTION_OVERHEAD
+        self.memory += size + ACTION_OVERHEAD
+        self.trim()
+        self.notify()
+
+
+    def separator(self):
+        """Close the current undo entry."""
+        self.text.orig_call("edit", "separator")
+        self.close_group()
+
+
+    def close_group(self):
+        """Mark the current undo entry as finished."""
+        self.group_open = False
+
+
+    def trim(self):
+        """Drop the oldest undo entries until the history fits its budgets."""
+        dropped = 0
+        while (len(self.undo_sizes) > max(self.max_entries, 1)
+               or (self.memory > self.max_bytes and len(self.undo_sizes) > 1)):
+            self.memory -= self.undo_sizes.popleft()
+            dropped += 1
+
+        if dropped:
+            # Lowering maxundo makes Tk drop its oldest entries as well.
+            # Tk's depth only counts closed entries, not the open one.
+            closed = len(self.undo_sizes) - 1 if self.group_open else len(self.undo_sizes)
+            self.text.configure(maxundo=max(closed, 1))
+            self.text.configure(maxundo=self.max_entries)
+
+
+    def begin_group(self):
+        """Start recording edits as a single undo entry."""
+        if not self.bulk_depth:
+            self.separator()
+        self.bulk_depth += 1
+
+
+    def end_group(self):
+        """Finish the undo entry started by begin_group()."""
+        self.bulk_depth -= 1
+        if not self.bulk_depth:
+            self.separator()
+            self.last_kind = None
+
+
+    @contextmanager
+    def group(self):
+        """Record every edit made inside the block as a single undo entry."""
+        self.begin_group()
+        try:
+            yield
+        finally:
+            self.end_group()
+
+
+    def notify(self):
+        """Call the on_change callback, if one is set."""
+        if self.on_change:
+            self.on_change()
+
+
+    def describe(self):
+        """Return a short description of the history for the status bar."""
+        memory = self.memory
+        if memory >= 1024 * 1024:
+            size = f"{memory / (1024 * 1024):.1f} MB"
+        else:
+            size = f"{memory / 1024:.1f} KB"
+        return f"Undo: {self.entries} ({size})"